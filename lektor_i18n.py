@@ -1,8 +1,14 @@
-import collections
+import concurrent.futures
 import datetime
+import functools
 import gettext
+import glob
+import hashlib
+import mmap
 import os
 import re
+import shutil
+import sys
 import tempfile
 import time
 from os.path import exists, join, relpath
@@ -10,6 +16,8 @@ from pprint import PrettyPrinter
 from textwrap import dedent
 from urllib.parse import urljoin
 import polib
+from babel.core import UnknownLocaleError
+from babel.messages.plurals import get_plural
 
 from lektor.context import get_ctx
 from lektor.db import Page
@@ -21,13 +29,86 @@ from lektor.reporter import reporter
 from lektor.types.flow import FlowType, process_flowblock_data
 from lektor.utils import locate_executable, portable_popen
 
-command_re = re.compile(r"([a-zA-Z0-9.-_]+):\s*(.*?)?\s*$")
+command_re = re.compile(r"([A-Za-z0-9._-]+):\s*(.*?)?\s*$")
 # derived from lektor.types.flow but allows more dash signs
 block2re = re.compile(r"^###(#+)\s*([^#]*?)\s*###(#+)\s*$")
+# paragraphs are separated by one or more blank lines
+_PAR_SPLIT_RE = re.compile(r"\n(?:\s*\n){1,}")
+_POT_DATE_RE = re.compile(r'("POT-Creation-Date:\s*)(\d{4}-\d{2}-\d{2}.*)(\\n")')
+_NPLURALS_RE = re.compile(r"nplurals\s*=\s*(\d+)")
+
+# minimum number of (page, language) pairs to translate in a process pool
+_PARALLEL_THRESHOLD = 64
+
+
+def _fast_escape(msg):
+    """Escape a string for use in a POT file. Each str.replace is a single
+    C-level scan, which beats both str.translate with a multi-character table
+    and codecs.escape_encode (which also mangles non-ASCII text)."""
+    return (
+        msg.replace("\\", "\\\\")  # must come first
+        .replace("\n", "\\n")
+        .replace("\t", "\\t")
+        .replace('"', '\\"')
+    )
+
+
+class _MemoTranslator:
+    """Wraps a gettext translator, memoizing the results of `gettext`. Other
+    methods (ngettext, pgettext, ...) are passed through."""
+
+    def __init__(self, translator):
+        self.translator = translator
+        self.cache = {}
+
+    def gettext(self, message):
+        translation = self.cache.get(message)
+        if translation is None:
+            translation = self.cache[message] = self.translator.gettext(message)
+        return translation
+
+    def __getattr__(self, name):
+        return getattr(self.translator, name)
+
+
+# gettext translators, keyed by (i18npath, language); cleared before each build
+_TRANS_CACHE: dict[tuple[str, str], _MemoTranslator] = {}
+
+
+def _get_translator(i18npath, language):
+    """Return the (cached) gettext translator for the given language."""
+    key = (i18npath, language)
+    translator = _TRANS_CACHE.get(key)
+    if translator is None:
+        # gettext.translation() caches parsed catalogs for the lifetime of the
+        # process, so load the .mo file ourselves to see recompiled catalogs
+        mo_filename = gettext.find(
+            "contents", join(i18npath, "_compiled"), languages=[language]
+        )
+        if mo_filename is None:
+            catalog = gettext.NullTranslations()
+        else:
+            with open(mo_filename, "rb") as f:
+                catalog = gettext.GNUTranslations(f)
+        translator = _TRANS_CACHE[key] = _MemoTranslator(catalog)
+    return translator
+
+
+# dynamic strings (`_("...")` in templates) already added to translation memory
+_DYNAMIC_SEEN: set[str] = set()
+
+
+@functools.lru_cache(maxsize=8192)
+def _translate_tag_cached(i18npath, locale, tag_string):
+    """Translate an (already stripped) template string into `locale`."""
+    return _get_translator(i18npath, locale).gettext(tag_string)
 
 
 # pylint: disable=too-few-public-methods,redefined-variable-type
 class TemplateTranslator:
+    # used outside of a build context, shared by all instances
+    _NULL = gettext.NullTranslations()
+
     def __init__(self, i18npath):
         self.i18npath = i18npath
         self.__lastlang = None
@@ -37,16 +118,17 @@ class TemplateTranslator:
     def init_translator(self):
         ctx = get_ctx()
         if not ctx:
-            self.translator = gettext.GNUTranslations()
-            return super().__init__()
+            if self.translator is not self._NULL:
+                self.translator = self._NULL
+                self.__lastlang = None
+            return
         if not self.__lastlang == ctx.locale:
             self.__lastlang = ctx.locale
-            self.translator = gettext.translation(
-                "contents",
-                join(self.i18npath, "_compiled"),
-                languages=[ctx.locale],
-                fallback=True,
-            )
+            self.translator = _get_translator(self.i18npath, ctx.locale)
+
+    def reset(self):
+        """Forget the current translator, e.g. after the catalogs changed."""
+        self.__lastlang = None
 
     def gettext(self, x):
         self.init_translator()  # language could have changed
@@ -70,24 +152,33 @@ class Translations:
 
     def __init__(self):
         # dict like {'text' : ['source1', 'source2',...],}
-        self.translations = collections.OrderedDict()
+        self.translations = {}
 
     def add(self, text, source):
-        if text not in self.translations.keys():
-            self.translations[text] = []
+        # short messages repeat a lot across pages, share a single copy
+        if len(text) < 256:
+            text = sys.intern(text)
+        sources = self.translations.get(text)
+        if sources is None:
+            sources = self.translations[text] = []
             reporter.report_debug_info(
                 f"Added to translation memory: "
                 f"{f'{text:.32}...' if len(text) > 32 else text}",
                 text,
             )
-        if source not in self.translations[text]:
-            self.translations[text].append(source)
+        if source not in sources:
+            sources.append(source)
 
     def __repr__(self):
         return PrettyPrinter(2).pformat(self.translations)
 
     def as_pot(self, content_language, header):
         """returns a POT version of the translation dictionary"""
+        return "".join(self._iter_pot_chunks(content_language, header))
+
+    def _iter_pot_chunks(self, content_language, header):
+        """yields the POT version of the translation dictionary, one message
+        at a time"""
         now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
         now += f"+{(time.tzname[0])}"
         header = dedent(
@@ -107,49 +198,65 @@ class Translations:
             """
         )
 
-        pot_elements = [header]
-
         # Sort the translations by path, only include a key if content exists.
         translations_by_path = [
             (sorted(paths), msg) for msg, paths in self.translations.items() if msg
         ]
+        yield header
         for paths, msg in sorted(translations_by_path):
-            for token, repl in {
-                "\\": "\\\\",
-                "\n": "\\n",
-                "\t": "\\t",
-                '"': '\\"',
-            }.items():
-                msg = msg.replace(token, repl)
-            pot_elements.append(f'#: {" ".join(paths)}\nmsgid "{msg}"\nmsgstr ""\n\n')
-        return "".join(pot_elements)
+            yield f'#: {" ".join(paths)}\nmsgid "{_fast_escape(msg)}"\nmsgstr ""\n\n'
 
     @staticmethod
     def read_pot_header(pot_filename):
-        with open(pot_filename) as f:
-            line = None
-            header_lines = []
-            while line != "\n":
-                line = f.readline()
-                header_lines.append(line)
-            return "".join(header_lines)
+        with open(pot_filename, "rb") as f:
+            if not os.fstat(f.fileno()).st_size:
+                return ""  # empty files can't be mapped
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # the header ends with the first blank line, which is included
+                end = mm.find(b"\n\n")
+                return mm[: end + 2 if end != -1 else len(mm)].decode("utf-8")
 
     def write_pot(self, pot_filename, language):
         if not os.path.exists(os.path.dirname(pot_filename)):
             os.makedirs(os.path.dirname(pot_filename))
-            header = None
-        else:
+        if os.path.exists(pot_filename):
             header = self.read_pot_header(pot_filename)
-        with open(pot_filename, "w") as f:
-            f.write(self.as_pot(language, header))
+        else:
+            header = None
+        with open(pot_filename, "w", encoding="utf-8", buffering=1 << 20) as f:
+            f.writelines(self._iter_pot_chunks(language, header))
 
     @staticmethod
-    def merge_pot(from_filenames, to_filename, projectname):
+    def merge_pot(from_filenames, to_filename, projectname, use_xgettext=False):
+        """Merge POT files into `to_filename`, keeping the header (and thus the
+        POT-Creation-Date) of the first one. Entries are sorted by path."""
+        if use_xgettext:
+            Translations.merge_pot_with_xgettext(
+                from_filenames, to_filename, projectname
+            )
+            return
+        merged = polib.pofile(from_filenames[0])
+        merged.metadata["Project-Id-Version"] = f"{projectname} 1.0"
+        entries = {(entry.msgctxt, entry.msgid): entry for entry in merged}
+        for filename in from_filenames[1:]:
+            for entry in polib.pofile(filename):
+                known = entries.get((entry.msgctxt, entry.msgid))
+                if known is None:
+                    entries[(entry.msgctxt, entry.msgid)] = entry
+                    merged.append(entry)
+                    continue
+                for occurrence in entry.occurrences:
+                    if occurrence not in known.occurrences:
+                        known.occurrences.append(occurrence)
+        merged.sort(key=lambda entry: entry.occurrences)
+        merged.save(to_filename)
+
+    @staticmethod
+    def merge_pot_with_xgettext(from_filenames, to_filename, projectname):
         # Get the POT Creation Date of the first file and inject it later.
-        pattern = r'("POT-Creation-Date:\s*)(\d{4}-\d{2}-\d{2}.*)(\\n")'
         with open(from_filenames[0], 'r', encoding='utf-8') as f:
             original_file1 = f.read()
-        date1 = re.search(pattern, original_file1).group(2)
+        date1 = _POT_DATE_RE.search(original_file1).group(2)
         
         xgettext = locate_executable("xgettext")
         if xgettext is None:
@@ -164,7 +271,7 @@ class Translations:
         with open(to_filename, 'r', encoding='utf-8') as f:
             finishedfile_orig = f.read()
         replacement = r'\g<1>' + date1 + r'\g<3>'
-        finishedcontent = re.sub(pattern, replacement, finishedfile_orig, count=1)
+        finishedcontent = _POT_DATE_RE.sub(replacement, finishedfile_orig, count=1)
         with open(to_filename, 'w', encoding='utf-8') as f:
             f.write(finishedcontent)
 
@@ -203,54 +310,114 @@ def fill_translations(po_filepath, save_path=None):
     po.save(save_path or po_filepath)
 
 
+def _expand_plural_slots(po, nplurals):
+    """Give every plural entry of `po` exactly one msgstr per plural form."""
+    for entry in po:
+        if entry.msgid_plural:
+            entry.msgstr_plural = {
+                idx: entry.msgstr_plural.get(idx, "") for idx in range(nplurals)
+            }
+
+
 class POFile:
+    """A <language>.po file. By default it is handled in-process with polib;
+    with `use_gettext_tools` the GNU gettext binaries are used instead."""
+
     FILENAME_PATTERN = "contents+{}.po"
 
-    def __init__(self, language, i18npath):
+    def __init__(self, language, i18npath, use_gettext_tools=False):
         self.language = language
         self.i18npath = i18npath
+        self.use_gettext_tools = use_gettext_tools
+        self.filename = self.FILENAME_PATTERN.format(language)
+        self.path = join(i18npath, self.filename)
 
     def _exists(self):
         """Returns True if <language>.po file exists in i18npath"""
-        filename = self.FILENAME_PATTERN.format(self.language)
-        return exists(join(self.i18npath, filename))
+        return exists(self.path)
+
+    def _run_gettext_tool(self, tool, *args):
+        cmdline = [locate_executable(tool), *args]
+        reporter.report_debug_info(f"{tool} cmd line", cmdline)
+        portable_popen(cmdline, cwd=self.i18npath).wait()
 
     def _msg_init(self):
         """Generates the first <language>.po file"""
-        msginit = locate_executable("msginit")
-        cmdline = [
-            msginit,
-            "-i",
-            "contents.pot",
-            "-l",
-            self.language,
-            "-o",
-            self.FILENAME_PATTERN.format(self.language),
-            "--no-translator",
-        ]
-        reporter.report_debug_info("msginit cmd line", cmdline)
-        portable_popen(cmdline, cwd=self.i18npath).wait()
-        clear_translations(self.FILENAME_PATTERN.format(self.language))
+        if self.use_gettext_tools:
+            self._run_gettext_tool(
+                "msginit",
+                "-i",
+                "contents.pot",
+                "-l",
+                self.language,
+                "-o",
+                self.filename,
+                "--no-translator",
+            )
+            clear_translations(self.path)
+            return
+        po = polib.pofile(join(self.i18npath, "contents.pot"))
+        po.metadata.update(
+            {
+                "PO-Revision-Date": datetime.datetime.now()
+                .astimezone()
+                .strftime("%Y-%m-%d %H:%M%z"),
+                "Last-Translator": "Automatically generated",
+                "Language-Team": "none",
+                "Language": self.language,
+            }
+        )
+        try:
+            plural = get_plural(self.language)
+        except (UnknownLocaleError, ValueError):
+            reporter.report_generic(
+                f"Unknown plural forms for {self.language}, please fill in the "
+                f"Plural-Forms header of {self.filename} manually"
+            )
+        else:
+            po.metadata["Plural-Forms"] = plural.plural_forms
+            _expand_plural_slots(po, plural.num_plurals)
+        po.save(self.path)
 
     def _msg_merge(self):
         """Merges an existing <language>.po file with .pot file"""
-        msgmerge = locate_executable("msgmerge")
-        cmdline = [
-            msgmerge,
-            self.FILENAME_PATTERN.format(self.language),
-            "contents.pot",
-            "-U",
-            "-N",
-            "--sort-by-file",
-            "--backup=simple",
-        ]
-        reporter.report_debug_info("msgmerge cmd line", cmdline)
-        portable_popen(cmdline, cwd=self.i18npath).wait()
-    
+        if self.use_gettext_tools:
+            self._run_gettext_tool(
+                "msgmerge",
+                self.filename,
+                "contents.pot",
+                "-U",
+                "-N",
+                "--sort-by-file",
+                "--backup=simple",
+            )
+            return
+        shutil.copyfile(self.path, f"{self.path}~")  # like --backup=simple
+        pot = polib.pofile(join(self.i18npath, "contents.pot"))
+        po = polib.pofile(self.path)
+        # like msgmerge -N: keep translations of known messages, no fuzzy
+        # matching, and messages which disappeared from the POT become obsolete
+        existing = {(entry.msgctxt, entry.msgid): entry for entry in po}
+        merged = []
+        for ref in pot:
+            entry = existing.pop((ref.msgctxt, ref.msgid), None) or polib.POEntry()
+            entry.merge(ref)
+            merged.append(entry)
+        for entry in existing.values():
+            entry.obsolete = True
+            merged.append(entry)
+        po[:] = merged
+        po.metadata["POT-Creation-Date"] = pot.metadata.get("POT-Creation-Date", "")
+        # the POT only has two msgstr slots for new plural messages
+        match = _NPLURALS_RE.search(po.metadata.get("Plural-Forms", ""))
+        if match:
+            _expand_plural_slots(po, int(match.group(1)))
+        po.save()
+
     def reformat(self):
-        msgcat = locate_executable("msgcat")
-        cmdline = [msgcat, self.FILENAME_PATTERN.format(self.language), "-o", self.FILENAME_PATTERN.format(self.language)]
-        portable_popen(cmdline, cwd=self.i18npath).wait()
+        # without the gettext tools, the file was just written by polib already
+        if self.use_gettext_tools:
+            self._run_gettext_tool("msgcat", self.filename, "-o", self.filename)
 
     def _prepare_locale_dir(self):
         """Prepares the i18n/<language>/LC_MESSAGES/ to store the .mo file;
@@ -265,16 +432,16 @@ class POFile:
 
     def _msg_fmt(self, locale_dirname):
         """Compile an existing <language>.po file into a .mo file"""
-        msgfmt = locate_executable("msgfmt")
-        cmdline = [
-            msgfmt,
-            "--use-fuzzy",
-            self.FILENAME_PATTERN.format(self.language),
-            "-o",
-            join(locale_dirname, "contents.mo"),
-        ]
-        reporter.report_debug_info("msgfmt cmd line", cmdline)
-        portable_popen(cmdline, cwd=self.i18npath).wait()
+        mo_filename = join(locale_dirname, "contents.mo")
+        if self.use_gettext_tools:
+            self._run_gettext_tool(
+                "msgfmt", "--use-fuzzy", self.filename, "-o", mo_filename
+            )
+            return
+        po = polib.pofile(self.path)
+        for entry in po.fuzzy_entries():  # like msgfmt --use-fuzzy
+            entry.flags.remove("fuzzy")
+        po.save_as_mofile(join(self.i18npath, mo_filename))
 
     def generate(self):
         if self._exists():
@@ -299,13 +466,128 @@ def line_starts_new_block(line, prev_line):
     if not prev_line or ":" not in prev_line:
         return False  # could be a Markdown heading
     line = line.strip()
-    return line == "-" * len(line) and len(line) >= 3
+    return len(line) >= 3 and not line.strip("-")
 
 
 def split_paragraphs(document):
     if isinstance(document, (list, tuple)):
         document = "".join(document)  # list of lines
-    return re.split("\n(?:\\s*\n){1,}", document)
+    return _PAR_SPLIT_RE.split(document)
+
+
+def _iter_line_blocks(lines):
+    """Yield the ('raw' | 'translatable', text) pieces of a source file, line
+    by line, without merging neighbours of the same type."""
+    count_lines_block = 0  # counting the number of lines of the current block
+    is_content = False
+    prev_line = None
+    for line in lines:
+        stripped_line = line.strip()
+        if not stripped_line:  # empty line
+            yield "raw", "\n"
+            continue
+        # line like "---*" or a new block tag
+        if line_starts_new_block(stripped_line, prev_line) or block2re.search(
+            stripped_line
+        ):
+            count_lines_block = 0
+            is_content = False
+            yield "raw", line
+        else:
+            count_lines_block += 1
+            match = command_re.search(stripped_line)
+            if (
+                count_lines_block == 1 and not is_content and match
+            ):  # handle first line, while not in content
+                key, value = match.groups()
+                yield "raw", f"{key}:"
+                if value:
+                    yield "raw", " "
+                    yield "translatable", value
+                yield "raw", "\n"
+            else:
+                is_content = True
+        if is_content:
+            yield "translatable", line
+        prev_line = line
+
+
+def _iter_source_blocks(lines):
+    """Parse structure of source file. In short, there are two types of
+    chunks: those which need to be translated ('translatable') and those
+    which don't ('raw'). "title: test" could be split into:
+    [('raw': 'title: ',), ('translatable', 'test')]
+    Chunks are yielded as soon as they are complete, so `lines` can be an
+    open file.
+    NOTE: There is no guarantee that multiple raw blocks couldn't occur and
+    in fact due to implementation details, this actually happens."""
+    # fragments of the current chunk are only joined once it is complete
+    pending_type, pending = None, []
+    for type, data in _iter_line_blocks(lines):
+        if type == pending_type:  # same type, merge
+            pending.append(data)
+        else:
+            if pending_type is not None:
+                yield pending_type, "".join(pending)
+            pending_type, pending = type, [data]
+    if pending_type is not None:
+        yield pending_type, "".join(pending)
+
+
+def _trans_linewise(content, translator):
+    """Translate the chunk linewise."""
+    lines = []
+    for line in content.split("\n"):
+        line_stripped = line.strip()
+        trans_stripline = ""
+        if line_stripped:
+            trans_stripline = translator.gettext(
+                line_stripped
+            )  # translate the stripped version
+        # and re-inject the stripped translation into original line (not stripped)
+        lines.append(line.replace(line_stripped, trans_stripline, 1))
+    return "\n".join(lines)
+
+
+def _trans_parwise(content, translator):
+    """Extract translatable strings block-wise, query for translation of
+    block and re-inject result."""
+    result = []
+    for paragraph in split_paragraphs(content):
+        stripped = paragraph.strip("\n\r")
+        paragraph = paragraph.replace(stripped, translator.gettext(stripped))
+        result.append(paragraph)
+    return "\n\n".join(result)
+
+
+def _translate_one(fn, language, i18npath, trans_parwise):
+    """Write the `language` alternative of the content file `fn`."""
+    # alternatives are generated, translating one would overwrite the source
+    assert os.path.basename(fn) == "contents.lr", f"{fn} is not a source file"
+    translator = _get_translator(i18npath, language)
+    translated_filename = join(os.path.dirname(fn), f"contents+{language}.lr")
+    contents = FileContents(fn)
+    # write to a temporary file first, so that a failure halfway through never
+    # leaves a truncated alternative behind for Lektor to build
+    tmp_filename = f"{translated_filename}.tmp"
+    try:
+        with contents.open(encoding="utf-8") as file:
+            with open(tmp_filename, "w", encoding="utf-8") as f:
+                for content_type, content in _iter_source_blocks(file):
+                    if content_type == "raw":
+                        f.write(content)
+                    elif content_type == "translatable":
+                        if trans_parwise:  # translate per paragraph
+                            f.write(_trans_parwise(content, translator))
+                        else:
+                            f.write(_trans_linewise(content, translator))
+                    else:
+                        raise RuntimeError("Unknown chunk type detected, this is a bug")
+        os.replace(tmp_filename, translated_filename)
+    except BaseException:
+        if exists(tmp_filename):
+            os.unlink(tmp_filename)
+        raise
 
 
 # We cannot check for unused arguments here, they're mandated by the plugin API.
@@ -320,21 +602,17 @@ class I18NPlugin(Plugin):
         tag_string = tag_string.strip()
         ctx = get_ctx()
         if self.content_language == ctx.locale:
-            translations.add(tag_string, "(dynamic)")
-            reporter.report_debug_info(
-                f"Added to translation memory (dynamic):"
-                f"{f'{tag_string:.32}...' if len(tag_string) > 32 else tag_string}",
-                tag_string,
-            )
+            if tag_string not in _DYNAMIC_SEEN:
+                _DYNAMIC_SEEN.add(tag_string)
+                translations.add(tag_string, "(dynamic)")
+                reporter.report_debug_info(
+                    f"Added to translation memory (dynamic):"
+                    f"{f'{tag_string:.32}...' if len(tag_string) > 32 else tag_string}",
+                    tag_string,
+                )
             return tag_string
         else:
-            translator = gettext.translation(
-                "contents",
-                join(self.i18npath, "_compiled"),
-                languages=[ctx.locale],
-                fallback=True,
-            )
-            return translator.gettext(tag_string)
+            return _translate_tag_cached(self.i18npath, ctx.locale, tag_string)
 
     @staticmethod
     def choose_language(element_list, language, fallback="en", attribute="language"):
@@ -369,11 +647,14 @@ class I18NPlugin(Plugin):
             "translate_paragraphwise", "false"
         ) in ("true", "True", "1")
         self.content_language = self.get_config().get("content", "en")
+        # whether to shell out to the GNU gettext tools instead of using polib
+        self.use_gettext_tools = self.get_config().get(
+            "use_gettext_tools", "false"
+        ) in ("true", "True", "1")
         self.env.jinja_env.add_extension("jinja2.ext.i18n")
         self.env.jinja_env.policies["ext.i18n.trimmed"] = True  # do a .strip()
-        self.env.jinja_env.install_gettext_translations(
-            TemplateTranslator(self.i18npath)
-        )
+        self.template_translator = TemplateTranslator(self.i18npath)
+        self.env.jinja_env.install_gettext_translations(self.template_translator)
         try:
             self.translations_languages = (
                 self.get_config().get("translations").replace(" ", "").split(",")
@@ -391,14 +672,20 @@ class I18NPlugin(Plugin):
         self.env.jinja_env.globals["_"] = self.translate_tag
         self.env.jinja_env.globals["choose_language"] = self.choose_language
 
-    def process_node(self, fields, sections, source, zone, root_path):
+    def process_node(
+        self, fields, sections, source, zone, root_path, url=None, source_path=None
+    ):
         """For a given node (), identify all fields to translate, and add new
-        fields to translations memory. Flow blocks are handled recursively."""
+        fields to translations memory. Flow blocks are handled recursively.
+        `url` and `source_path` only depend on `source` and are computed once
+        for the top-level call, then passed down."""
+        if url is None:
+            url = urljoin(self.url_prefix, source.url_path)
+        if source_path is None:
+            source_path = relpath(source.source_filename, root_path)
         for field in fields:
-            if (
-                ("translate" in field.options)
-                and (source.alt in (PRIMARY_ALT, self.content_language))
-                and (field.options["translate"] in ("True", "true", "1", 1))
+            if ("translate" in field.options) and (
+                field.options["translate"] in ("True", "true", "1", 1)
             ):
                 if field.name in sections.keys():
                     section = sections[field.name]
@@ -409,13 +696,9 @@ class I18NPlugin(Plugin):
                         if self.trans_parwise
                         else [x.strip() for x in section if x.strip()]
                     )
+                    origin = sys.intern(f"{url} ({source_path}:{zone}.{field.name})")
                     for chunk in chunks:
-                        translations.add(
-                            chunk.strip("\r\n"),
-                            f"{urljoin(self.url_prefix, source.url_path)} "
-                            f"({relpath(source.source_filename, root_path)}:"
-                            f"{zone}.{field.name})",
-                        )
+                        translations.add(chunk.strip("\r\n"), origin)
 
             if isinstance(field.type, FlowType):
                 if field.name in sections:
@@ -431,134 +714,50 @@ class I18NPlugin(Plugin):
                             source,
                             blockname,
                             root_path,
+                            url,
+                            source_path,
                         )
 
-    @staticmethod
-    def __parse_source_structure(lines):
-        """Parse structure of source file. In short, there are two types of
-        chunks: those which need to be translated ('translatable') and those
-        which don't ('raw'). "title: test" could be split into:
-        [('raw': 'title: ',), ('translatable', 'test')]
-        NOTE: There is no guarantee that multiple raw blocks couldn't occur and
-        in fact due to implementation details, this actually happens."""
-        blocks = []
-        count_lines_block = 0  # counting the number of lines of the current block
-        is_content = False
-        prev_line = None
-        for line in lines:
-            stripped_line = line.strip()
-            if not stripped_line:  # empty line
-                blocks.append(("raw", "\n"))
-                continue
-            # line like "---*" or a new block tag
-            if line_starts_new_block(stripped_line, prev_line) or block2re.search(
-                stripped_line
-            ):
-                count_lines_block = 0
-                is_content = False
-                blocks.append(("raw", line))
-            else:
-                count_lines_block += 1
-                match = command_re.search(stripped_line)
-                if (
-                    count_lines_block == 1 and not is_content and match
-                ):  # handle first line, while not in content
-                    key, value = match.groups()
-                    blocks.append(("raw", f"{key}:"))
-                    if value:
-                        blocks.append(("raw", " "))
-                        blocks.append(("translatable", value))
-                    blocks.append(("raw", "\n"))
-                else:
-                    is_content = True
-            if is_content:
-                blocks.append(("translatable", line))
-            prev_line = line
-        # join neighbour blocks of same type
-        newblocks = []
-        for type, data in blocks:
-            if len(newblocks) > 0 and newblocks[-1][0] == type:  # same type, merge
-                newblocks[-1][1] += data
-            else:
-                newblocks.append([type, data])
-        return newblocks
-
     def translate_contents(self):
         """Produce all content file alternatives (=translated pages)
         using the gettext translations available."""
-        for root, _, files in os.walk(os.path.join(self.env.root_path, "content")):
-            if re.match("content$", root):
-                continue
-            if "contents.lr" in files:
-                fn = os.path.join(root, "contents.lr")
-                contents = FileContents(fn)
-                for language in self.translations_languages:
-                    translator = gettext.translation(
-                        "contents",
-                        join(self.i18npath, "_compiled"),
-                        languages=[language],
-                        fallback=True,
-                    )
-                    translated_filename = os.path.join(root, f"contents+{language}.lr")
-                    with contents.open(encoding="utf-8") as file:
-                        chunks = self.__parse_source_structure(file.readlines())
-                    with open(translated_filename, "w") as f:
-                        for (
-                            content_type,
-                            content,
-                        ) in chunks:  # see __parse_source_structure
-                            if content_type == "raw":
-                                f.write(content)
-                            elif content_type == "translatable":
-                                if self.trans_parwise:  # translate per paragraph
-                                    f.write(self.__trans_parwise(content, translator))
-                                else:
-                                    f.write(self.__trans_linewise(content, translator))
-                            else:
-                                raise RuntimeError(
-                                    "Unknown chunk type detected, this is a bug"
-                                )
-
-    @staticmethod
-    def __trans_linewise(content, translator):
-        """Translate the chunk linewise."""
-        lines = []
-        for line in content.split("\n"):
-            line_stripped = line.strip()
-            trans_stripline = ""
-            if line_stripped:
-                trans_stripline = translator.gettext(
-                    line_stripped
-                )  # translate the stripped version
-            # and re-inject the stripped translation into original line (not stripped)
-            lines.append(line.replace(line_stripped, trans_stripline, 1))
-        return "\n".join(lines)
-
-    @staticmethod
-    def __trans_parwise(content, translator):
-        """Extract translatable strings block-wise, query for translation of
-        block and re-inject result."""
-        result = []
-        for paragraph in split_paragraphs(content):
-            stripped = paragraph.strip("\n\r")
-            paragraph = paragraph.replace(stripped, translator.gettext(stripped))
-            result.append(paragraph)
-        return "\n\n".join(result)
+        filenames = [
+            os.path.join(root, "contents.lr")
+            for root, _, files in os.walk(os.path.join(self.env.root_path, "content"))
+            if "contents.lr" in files
+        ]
+        jobs = [
+            (fn, language, self.i18npath, self.trans_parwise)
+            for fn in filenames
+            for language in self.translations_languages
+        ]
+        # small sites aren't worth the cost of starting a process pool
+        if len(jobs) < _PARALLEL_THRESHOLD:
+            for job in jobs:
+                _translate_one(*job)
+            return
+        with concurrent.futures.ProcessPoolExecutor() as executor:
+            futures = [executor.submit(_translate_one, *job) for job in jobs]
+            concurrent.futures.wait(futures)
+            for future in futures:
+                future.result()  # re-raise errors from the workers
 
     def on_after_build(self, builder, build_state, source, prog, **extra):
-        if self.enabled and isinstance(source, Page):
-            try:
-                text = source.contents.as_text()
-            except OSError:
-                pass
-            else:
-                fields = source.datamodel.fields
-                sections = dict(
-                    tokenize(text.splitlines())
-                )  # {'sectionname':[list of section texts]}
-                self.process_node(
-                    fields, sections, source, source.datamodel.id, builder.env.root_path
-                )
+        if not self.enabled or not isinstance(source, Page):
+            return
+        # only the source language feeds the translation memory
+        if source.alt not in (PRIMARY_ALT, self.content_language):
+            return
+        try:
+            with source.contents.open(encoding="utf-8") as f:
+                # {'sectionname':[list of section texts]}
+                sections = dict(tokenize(f))
+        except OSError:
+            return
+        fields = source.datamodel.fields
+        self.process_node(
+            fields, sections, source, source.datamodel.id, builder.env.root_path
+        )
 
     def get_templates_pot_filename(self):
         try:
@@ -570,7 +769,49 @@ class I18NPlugin(Plugin):
             self.pot_templates_filename = self.pot_templates_file.name
             return self.pot_templates_filename
 
+    def get_templates_hash(self):
+        """Hash of the modification times of all templates and `babel.cfg`,
+        used to detect whether the templates POT needs to be extracted again."""
+        root_path = self.env.root_path
+        paths = glob.glob(
+            join(root_path, "**", "templates", "**", "*.html"), recursive=True
+        )
+        paths.append(join(root_path, "babel.cfg"))
+        digest = hashlib.blake2b()
+        for path in sorted(set(paths)):
+            if exists(path):
+                digest.update(f"{path}:{os.path.getmtime(path)}\n".encode())
+        return digest.hexdigest()
+
+    def parse_templates(self, templates_pot_filename):
+        """Extract the templates POT with pybabel, unless the templates are
+        unchanged since the previous build, in which case the POT cached under
+        `.lektor/` is reused."""
+        cache_dir = join(self.env.root_path, ".lektor")
+        cached_pot_filename = join(cache_dir, "i18n_templates.pot")
+        cached_hash_filename = join(cache_dir, "i18n_templates.hash")
+        templates_hash = self.get_templates_hash()
+        try:
+            with open(cached_hash_filename, encoding="utf-8") as f:
+                cached_hash = f.read().strip()
+        except OSError:
+            cached_hash = None
+        if cached_hash == templates_hash and exists(cached_pot_filename):
+            reporter.report_generic("Templates unchanged, reusing cached POT")
+            shutil.copyfile(cached_pot_filename, templates_pot_filename)
+            return
+        translations.parse_templates(templates_pot_filename)
+        if os.path.getsize(templates_pot_filename):  # pybabel produced a POT
+            os.makedirs(cache_dir, exist_ok=True)
+            shutil.copyfile(templates_pot_filename, cached_pot_filename)
+            with open(cached_hash_filename, "w", encoding="utf-8") as f:
+                f.write(templates_hash)
+
     def on_before_build_all(self, builder, **extra):
+        # .mo files may have been recompiled since the last build
+        _TRANS_CACHE.clear()
+        _translate_tag_cached.cache_clear()
+        self.template_translator.reset()
         if self.enabled:
             reporter.report_generic(
                 f"i18n activated, with main language {self.content_language}"
@@ -580,10 +821,10 @@ class I18NPlugin(Plugin):
                 f"Parsing templates for i18n into "
                 f"{relpath(templates_pot_filename, builder.env.root_path)}"
             )
-            translations.parse_templates(templates_pot_filename)
+            self.parse_templates(templates_pot_filename)
             # compile existing po files
             for language in self.translations_languages:
-                po_file = POFile(language, self.i18npath)
+                po_file = POFile(language, self.i18npath, self.use_gettext_tools)
                 po_file.compile()
             # walk through contents.lr files and produce alternatives
             # before the build system creates its work queue
@@ -608,15 +849,20 @@ class I18NPlugin(Plugin):
         reporter.report_generic(f"{relpath(pots[0], builder.env.root_path)} generated")
         pots = [p for p in pots if os.path.exists(p)]  # only keep existing ones
         if len(pots) > 1:
-            translations.merge_pot(pots, contents_pot_filename, self.env.project.name)
+            translations.merge_pot(
+                pots,
+                contents_pot_filename,
+                self.env.project.name,
+                use_xgettext=self.use_gettext_tools,
+            )
             reporter.report_generic(
                 f"Merged POT files "
                 f"{', '.join(relpath(p, builder.env.root_path) for p in pots)}"
             )
 
         for language in self.translations_languages:
-            po_file = POFile(language, self.i18npath)
+            po_file = POFile(language, self.i18npath, self.use_gettext_tools)
             po_file.generate()
             if language == self.content_language:
-                fill_translations(po_file.FILENAME_PATTERN.format(po_file.language))
+                fill_translations(po_file.path)
             po_file.reformat()